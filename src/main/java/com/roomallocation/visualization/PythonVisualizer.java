@@ -2,81 +2,153 @@ package com.roomallocation.visualization;
 
 import java.io.*;
 import java.nio.file.*;
-import java.util.ArrayList;
-import java.util.List;
+import java.util.Comparator;
+import java.util.HashMap;
+import java.util.Map;
+import java.util.concurrent.TimeUnit;
+import java.util.stream.Stream;
+
+/**
+ * Runs the Python visualization scripts as long-lived servers, so that
+ * interpreter start-up and matplotlib/seaborn imports are paid once rather
+ * than on every call to {@link #visualize(String)}. Close the visualizer to
+ * stop the servers.
+ */
+public class PythonVisualizer implements AutoCloseable {
+    // Scripts import their shared helpers from room_viz.py, so all of them
+    // are extracted together into the same directory
+    private static final String[] PYTHON_RESOURCES = {
+        "/room_viz.py", "/visualize.py", "/visualize_map.py"
+    };
+
+    // Each JSON path sent to a server is answered by one of these lines; the
+    // marker keeps ordinary script output from being taken for a reply
+    private static final String RESPONSE_OK = "@@VISUALIZE OK ";
+    private static final String RESPONSE_ERROR = "@@VISUALIZE ERROR ";
+
+    // How long close() waits for a server to finish before killing it
+    private static final long SHUTDOWN_TIMEOUT_SECONDS = 30;
 
-public class PythonVisualizer {
     private final String pythonExecutable;
-    
+    private final Map<String, Process> servers = new HashMap<>();
+    private Path scriptDir;
+
     public PythonVisualizer(String pythonExecutable) {
         this.pythonExecutable = pythonExecutable;
     }
-    
-    private void extractAndRunPythonScript(String resourcePath, String jsonPath) throws IOException, InterruptedException {
-        // Create output directory if it doesn't exist
-        Path jsonFilePath = Paths.get(jsonPath);
-        Files.createDirectories(jsonFilePath.getParent());
-        
-        // Copy Python script from resources to a temporary file
-        Path tempScript = extractPythonScript(resourcePath);
-        
-        try {
-            List<String> command = new ArrayList<>();
-            command.add(pythonExecutable);
-            command.add(tempScript.toString());
-            command.add(jsonPath);
-
-            ProcessBuilder processBuilder = new ProcessBuilder(command);
-            processBuilder.redirectErrorStream(true);
-
-            Process process = processBuilder.start();
-
-            // Read and print the Python script's output
-            try (BufferedReader reader = new BufferedReader(
-                    new InputStreamReader(process.getInputStream()))) {
-                String line;
-                while ((line = reader.readLine()) != null) {
-                    System.out.println("Python: " + line);
-                }
-            }
 
-            int exitCode = process.waitFor();
-            if (exitCode != 0) {
-                throw new RuntimeException("Python script failed with exit code: " + exitCode);
+    private Process getServer(String script) throws IOException {
+        Process server = servers.get(script);
+        if (server != null && server.isAlive()) {
+            return server;
+        }
+
+        if (scriptDir == null) {
+            scriptDir = extractPythonScripts();
+        }
+
+        ProcessBuilder processBuilder = new ProcessBuilder(
+                pythonExecutable, scriptDir.resolve(script).toString(), "--server");
+        // Only stdout carries replies; warnings and tracebacks go straight to stderr
+        processBuilder.redirectError(ProcessBuilder.Redirect.INHERIT);
+
+        server = processBuilder.start();
+        servers.put(script, server);
+        return server;
+    }
+
+    private void runPythonScript(String script, String jsonPath) throws IOException, InterruptedException {
+        Process server = getServer(script);
+
+        // Send the JSON path to the server
+        BufferedWriter writer = server.outputWriter();
+        writer.write(jsonPath);
+        writer.newLine();
+        writer.flush();
+
+        // Print the script's output until it answers for this path
+        BufferedReader reader = server.inputReader();
+        String line;
+        while ((line = reader.readLine()) != null) {
+            if (line.startsWith(RESPONSE_OK)) {
+                return;
             }
-        } finally {
-            // Clean up the temporary script file
-            try {
-                Files.deleteIfExists(tempScript);
-            } catch (IOException e) {
-                System.err.println("Warning: Could not delete temporary script file: " + e.getMessage());
+            if (line.startsWith(RESPONSE_ERROR)) {
+                throw new RuntimeException("Python script failed: "
+                        + line.substring(RESPONSE_ERROR.length()));
+            }
+            System.out.println("Python: " + line);
+        }
+
+        servers.remove(script);
+        throw new RuntimeException("Python script failed with exit code: " + server.waitFor());
+    }
+
+    private Path extractPythonScripts() throws IOException {
+        // Create a temporary directory holding the scripts and their shared module
+        Path scriptDir = Files.createTempDirectory("visualize_");
+
+        // Copy the scripts from resources to the temporary directory
+        for (String resourcePath : PYTHON_RESOURCES) {
+            try (InputStream is = getClass().getResourceAsStream(resourcePath)) {
+                if (is == null) {
+                    throw new IOException("Could not find " + resourcePath + " in resources");
+                }
+                Files.copy(is, scriptDir.resolve(resourcePath.substring(1)),
+                        StandardCopyOption.REPLACE_EXISTING);
             }
         }
+
+        return scriptDir;
     }
 
-    private Path extractPythonScript(String resourcePath) throws IOException {
-        // Create a temporary file for the Python script
-        Path tempScript = Files.createTempFile("visualize_", ".py");
-        
-        // Copy the script from resources to the temporary file
-        try (InputStream is = getClass().getResourceAsStream(resourcePath)) {
-            if (is == null) {
-                throw new IOException("Could not find " + resourcePath + " in resources");
+    private void deletePythonScripts(Path scriptDir) {
+        // Clean up the temporary scripts, including any __pycache__ Python wrote
+        try (Stream<Path> paths = Files.walk(scriptDir)) {
+            for (Path path : paths.sorted(Comparator.reverseOrder()).toList()) {
+                Files.deleteIfExists(path);
             }
-            Files.copy(is, tempScript, StandardCopyOption.REPLACE_EXISTING);
+        } catch (IOException e) {
+            System.err.println("Warning: Could not delete temporary script files: " + e.getMessage());
         }
-        
-        return tempScript;
     }
 
     public void visualize(String jsonPath) throws IOException, InterruptedException {
+        // Create output directory if it doesn't exist
+        Path jsonFilePath = Paths.get(jsonPath);
+        Files.createDirectories(jsonFilePath.getParent());
+
         System.out.println("Generating standard visualizations...");
-        extractAndRunPythonScript("/visualize.py", jsonPath);
-        
+        runPythonScript("visualize.py", jsonPath);
+
         System.out.println("\nGenerating room map visualization...");
-        extractAndRunPythonScript("/visualize_map.py", jsonPath);
-        
+        runPythonScript("visualize_map.py", jsonPath);
+
         System.out.println("\nVisualization completed successfully!");
-        System.out.println("Plots saved in directory: " + Paths.get(jsonPath).getParent());
+        System.out.println("Plots saved in directory: " + jsonFilePath.getParent());
+    }
+
+    @Override
+    public void close() throws InterruptedException {
+        // Closing stdin ends each server's read loop
+        for (Process server : servers.values()) {
+            try {
+                server.getOutputStream().close();
+            } catch (IOException e) {
+                server.destroy();
+            }
+        }
+        for (Process server : servers.values()) {
+            if (!server.waitFor(SHUTDOWN_TIMEOUT_SECONDS, TimeUnit.SECONDS)) {
+                System.err.println("Warning: Python visualizer did not exit, killing it");
+                server.destroyForcibly().waitFor();
+            }
+        }
+        servers.clear();
+
+        if (scriptDir != null) {
+            deletePythonScripts(scriptDir);
+            scriptDir = null;
+        }
     }
-}
\ No newline at end of file
+}
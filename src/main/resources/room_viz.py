@@ -0,0 +1,105 @@
+"""Helpers shared by the visualization scripts (visualize.py, visualize_map.py)."""
+import hashlib
+import json
+try:
+    import orjson  # Faster JSON parsing when available
+except ImportError:
+    orjson = None
+import matplotlib.pyplot as plt
+import pandas as pd
+import numpy as np
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Fast PNG encoding: plots are mostly flat colors, so a low zlib level costs
+# little in file size and saves most of the deflate time
+PNG_KWARGS = {'compress_level': 1}
+
+# Figures are kept open and cleared between runs so that visualizing a batch
+# of JSON files does not pay for figure construction on every file
+_figures = {}
+
+def get_figure(name, figsize):
+    """Return a cleared figure registered under `name`, creating it on first use."""
+    fig = _figures.get(name)
+    # A figure closed since it was registered (e.g. by plt.close('all') at the
+    # end of main()) can't be made current again, so it is replaced
+    if fig is None or not plt.fignum_exists(fig.number):
+        fig = plt.figure(figsize=figsize)
+        _figures[name] = fig
+    else:
+        fig.clf()
+        fig.set_size_inches(figsize)
+        plt.figure(fig.number)
+    return fig
+
+def read_input(filename):
+    """Return the raw bytes of a JSON input file."""
+    with open(filename, 'rb') as f:
+        return f.read()
+
+def parse_data(raw):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def load_data(filename):
+    return parse_data(read_input(filename))
+
+def read_and_parse(filename):
+    """Return a JSON file's raw bytes together with its parsed contents."""
+    raw = read_input(filename)
+    return raw, parse_data(raw)
+
+def rooms_dataframe(rooms_data):
+    """Flatten room records into a DataFrame with numeric course columns."""
+    df = pd.json_normalize(rooms_data, sep='_')
+    if 'course_size' not in df:  # No room is occupied
+        df['course_size'] = np.nan
+        df['course_name'] = None
+    df = df.drop(columns='course', errors='ignore')
+    
+    # Few distinct room types: integer category codes make grouping cheap
+    df['type'] = df['type'].astype('category')
+    
+    # Calculate utilization for occupied rooms
+    df['occupied'] = df['course_size'].notna()
+    sizes = df['course_size'].fillna(0).to_numpy(dtype=np.float64)
+    caps = df['capacity'].to_numpy(dtype=np.float64)
+    df['utilization'] = np.divide(sizes, caps, out=np.zeros_like(sizes),
+                                  where=caps != 0)
+    return df
+
+def input_digest(raw):
+    """Return a short BLAKE2b hex digest of a JSON file's raw bytes."""
+    return hashlib.blake2b(raw, digest_size=8).hexdigest()
+
+def prefetch_data(json_paths):
+    """Yield (json_path, raw, data) triples, reading and parsing the next file
+    in a background thread while the caller is still rendering the current one."""
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(read_and_parse, json_paths[0])
+        for i, json_path in enumerate(json_paths):
+            raw, data = future.result()
+            if i + 1 < len(json_paths):
+                future = executor.submit(read_and_parse, json_paths[i + 1])
+            yield json_path, raw, data
+
+def serve(render):
+    """Render each JSON path read from stdin until it is closed.
+    
+    Every path is answered with a single "@@VISUALIZE OK <path>" or
+    "@@VISUALIZE ERROR <message>" line so a long-lived caller pays for
+    interpreter and library start-up once.
+    """
+    for line in sys.stdin:
+        json_path = line.strip()
+        if not json_path:
+            continue
+        try:
+            render(json_path)
+        except Exception as e:
+            message = str(e).replace('\n', ' ')
+            print(f"@@VISUALIZE ERROR {message}", flush=True)
+        else:
+            print(f"@@VISUALIZE OK {json_path}", flush=True)
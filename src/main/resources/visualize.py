@@ -1,80 +1,78 @@
-import json
 import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
+import numpy as np
 import sys
 import os
-from statistics import mean
+from room_viz import (PNG_KWARGS, get_figure, load_data, prefetch_data,
+                      rooms_dataframe, serve)
 
-def load_data(filename):
-    with open(filename, 'r') as f:
-        return json.load(f)
+def plot_horizontal_bars(ax, labels, values):
+    """Draw one viridis-colored horizontal bar per label, first label on top."""
+    positions = np.arange(len(labels))
+    # seaborn's 'viridis' palette, desaturated as sns.barplot does by default
+    colors = sns.color_palette('viridis', len(labels), desat=0.75)
+    ax.barh(positions, values, color=colors)
+    ax.set_yticks(positions, labels)
+    ax.invert_yaxis()
+    ax.yaxis.grid(False)
 
 def plot_room_utilization(data, output_dir):
     rooms_data = data['allocation']['rooms']
     
     # Create DataFrame
-    df = pd.DataFrame(rooms_data)
-    df['occupied'] = df['course'].notna()
-    df['utilization'] = df.apply(
-        lambda x: x['course']['size'] / x['capacity'] if x['course'] else 0, 
-        axis=1
-    )
+    df = rooms_dataframe(rooms_data)
     
     # Group by type
-    by_type = df.groupby('type').agg({
+    by_type = df.groupby('type', observed=True).agg({
         'occupied': 'mean',
         'utilization': 'mean'
     }).sort_values('occupied', ascending=True)
     
     # Plot
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+    fig = get_figure('room_utilization', (15, 6))
+    ax1, ax2 = fig.subplots(1, 2)
     
     # Occupation rate
-    sns.barplot(
-        data=by_type.reset_index(),
-        y='type',
-        x='occupied',
-        ax=ax1,
-        palette='viridis'
-    )
+    plot_horizontal_bars(ax1, by_type.index, by_type['occupied'].to_numpy())
     ax1.set_title('Room Occupation Rate by Type')
     ax1.set_xlabel('Proportion of Rooms Occupied')
     ax1.set_ylabel('Room Type')
     
     # Utilization rate
-    sns.barplot(
-        data=by_type.reset_index(),
-        y='type',
-        x='utilization',
-        ax=ax2,
-        palette='viridis'
-    )
+    plot_horizontal_bars(ax2, by_type.index, by_type['utilization'].to_numpy())
     ax2.set_title('Average Room Utilization by Type')
     ax2.set_xlabel('Average Utilization (Size/Capacity)')
     ax2.set_ylabel('Room Type')
     
     plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'room_utilization.png'))
-    plt.close()
+    fig.savefig(os.path.join(output_dir, 'room_utilization.png'),
+                pil_kwargs=PNG_KWARGS)
     print(f"Generated room utilization plot")
 
 def plot_allocation_statistics(data, output_dir):
     stats = data['statistics'][0]  # Taking first simulation result
     
-    # Prepare data for choice distribution
-    choice_dist = {int(k): v for k, v in stats['choiceDistribution'].items()}
-    choices = range(1, max(choice_dist.keys()) + 1)
-    frequencies = [choice_dist.get(i, 0) for i in choices]
+    # Prepare data for choice distribution, scattering counts into a dense
+    # array so choices nobody got show up as zero
+    choice_dist = stats['choiceDistribution']
+    keys = np.fromiter((int(k) for k in choice_dist.keys()), dtype=np.int64,
+                       count=len(choice_dist))
+    vals = np.fromiter(choice_dist.values(), dtype=np.int64, count=len(choice_dist))
+    # Preassigned rooms are counted as choice 0; only choices 1.. are plotted
+    ranked = keys >= 1
+    keys = keys[ranked]
+    frequencies = np.zeros(keys.max() if len(keys) else 0, dtype=np.int64)
+    frequencies[keys - 1] = vals[ranked]
     
     # Create DataFrame for seaborn
     df = pd.DataFrame({
-        'Choice Number': list(choices),
+        'Choice Number': np.arange(1, len(frequencies) + 1),
         'Number of Courses': frequencies
     })
     
     # Plot
-    plt.figure(figsize=(10, 6))
+    get_figure('allocation_statistics', (10, 6))
     sns.barplot(data=df, x='Choice Number', y='Number of Courses', color='skyblue')
     plt.title('Distribution of Allocation Choices')
     plt.grid(True, alpha=0.3)
@@ -93,8 +91,8 @@ def plot_allocation_statistics(data, output_dir):
              bbox=dict(facecolor='white', alpha=0.8))
     
     plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'allocation_statistics.png'))
-    plt.close()
+    plt.savefig(os.path.join(output_dir, 'allocation_statistics.png'),
+                pil_kwargs=PNG_KWARGS)
     print(f"Generated allocation statistics plot")
 
 def plot_room_size_distribution(data, output_dir):
@@ -104,7 +102,7 @@ def plot_room_size_distribution(data, output_dir):
     # Filter out GRANDS_AMPHIS
     df_filtered = df[df['type'] != 'GRANDS_AMPHIS']
     
-    plt.figure(figsize=(12, 6))
+    get_figure('room_sizes', (12, 6))
     
     # Create boxplot
     ax = sns.boxplot(data=df_filtered, x='type', y='capacity', palette='viridis')
@@ -127,8 +125,8 @@ def plot_room_size_distribution(data, output_dir):
     plt.xlabel('Room Type')
     plt.ylabel('Capacity')
     plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'room_sizes.png'))
-    plt.close()
+    plt.savefig(os.path.join(output_dir, 'room_sizes.png'),
+                pil_kwargs=PNG_KWARGS)
     print(f"Generated room size distribution plot")
 
 
@@ -138,27 +136,26 @@ def plot_strategy_comparisons(data, output_dir):
     # Create DataFrame from statistics
     df_stats = pd.DataFrame(stats)
     
+    # Metrics are exported with a decimal comma; convert whole columns at once
+    metric_cols = ['allocationRate', 'firstChoiceRate', 'highRankRate', 'averageChoice']
+    for col in metric_cols:
+        df_stats[col] = (df_stats[col].astype(str)
+                         .str.replace(',', '.', regex=False)
+                         .astype(np.float64))
+    
     # Group by strategy and calculate means
-    strategy_means = df_stats.groupby('strategyName').agg({
-        'allocationRate': lambda x: mean(float(str(v).replace(',', '.')) for v in x),
-        'firstChoiceRate': lambda x: mean(float(str(v).replace(',', '.')) for v in x),
-        'highRankRate': lambda x: mean(float(str(v).replace(',', '.')) for v in x),
-        'averageChoice': lambda x: mean(float(str(v).replace(',', '.')) for v in x)
-    }).round(2)
+    strategy_means = df_stats.groupby('strategyName')[metric_cols].mean().round(2)
     
     # Sort by allocation rate
     strategy_means = strategy_means.sort_values('allocationRate', ascending=False)
     
     # Create figure with two subplots side by side
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+    fig = get_figure('strategy_comparison', (15, 6))
+    ax1, ax2 = fig.subplots(1, 2)
     
     # Plot allocation rates
-    bars1 = sns.barplot(
-        y=strategy_means.index,
-        x=strategy_means['allocationRate'],
-        ax=ax1,
-        palette='viridis'
-    )
+    plot_horizontal_bars(ax1, strategy_means.index,
+                         strategy_means['allocationRate'].to_numpy())
     ax1.set_title('Average Allocation Rate by Strategy')
     ax1.set_xlabel('Allocation Rate (%)')
     ax1.set_ylabel('Strategy')
@@ -168,12 +165,8 @@ def plot_strategy_comparisons(data, output_dir):
         ax1.text(v + 1, i, f'{v:.1f}%', va='center')
     
     # Plot first choice rates
-    bars2 = sns.barplot(
-        y=strategy_means.index,
-        x=strategy_means['firstChoiceRate'],
-        ax=ax2,
-        palette='viridis'
-    )
+    plot_horizontal_bars(ax2, strategy_means.index,
+                         strategy_means['firstChoiceRate'].to_numpy())
     ax2.set_title('Average First Choice Rate by Strategy')
     ax2.set_xlabel('First Choice Rate (%)')
     ax2.set_ylabel('Strategy')
@@ -183,12 +176,13 @@ def plot_strategy_comparisons(data, output_dir):
         ax2.text(v + 1, i, f'{v:.1f}%', va='center')
     
     plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'strategy_comparison.png'))
-    plt.close()
+    fig.savefig(os.path.join(output_dir, 'strategy_comparison.png'),
+                pil_kwargs=PNG_KWARGS)
     print(f"Generated strategy comparison plot")
 
     # Create additional plot for more detailed metrics with dual y-axes
-    fig, ax1 = plt.subplots(figsize=(12, 6))
+    fig = get_figure('strategy_metrics', (12, 6))
+    ax1 = fig.subplots()
     
     # Plot Average Choice on left y-axis
     color1 = '#2ecc71'  # Green
@@ -243,38 +237,49 @@ def plot_strategy_comparisons(data, output_dir):
     ax1.legend(lines1 + lines2, labels1 + labels2, loc='upper right')
     
     plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'strategy_metrics.png'))
-    plt.close()
+    fig.savefig(os.path.join(output_dir, 'strategy_metrics.png'),
+                pil_kwargs=PNG_KWARGS)
     print(f"Generated additional strategy metrics plot")
 
+def generate_plots(data, output_dir):
+    plot_room_utilization(data, output_dir)
+    plot_allocation_statistics(data, output_dir)
+    plot_room_size_distribution(data, output_dir)
+    plot_strategy_comparisons(data, output_dir)
+
+def visualize(json_path, data=None):
+    if data is None:
+        data = load_data(json_path)
+    generate_plots(data, os.path.dirname(json_path))
+
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python visualize.py <json_file_path>")
+        print("Usage: python visualize.py <json_file_path> [<json_file_path> ...]")
+        print("       python visualize.py --server  (reads JSON paths from stdin)")
         sys.exit(1)
     
-    json_path = sys.argv[1]
-    output_dir = os.path.dirname(json_path)
-    
-    print(f"Loading data from {json_path}")
+    if sys.argv[1] == '--server':
+        sns.set_theme(style="whitegrid")
+        serve(visualize)
+        return
     
     try:
         # Set seaborn style
         sns.set_theme(style="whitegrid")  # Use seaborn's whitegrid style
         
-        # Load data
-        data = load_data(json_path)
-        
-        # Generate all plots
-        plot_room_utilization(data, output_dir)
-        plot_allocation_statistics(data, output_dir)
-        plot_room_size_distribution(data, output_dir)
-        plot_strategy_comparisons(data, output_dir)
+        for json_path, _, data in prefetch_data(sys.argv[1:]):
+            print(f"Loading data from {json_path}")
+            
+            # Generate all plots
+            visualize(json_path, data)
         
         print("Visualization completed successfully!")
         
     except Exception as e:
         print(f"Error during visualization: {str(e)}")
         sys.exit(1)
+    finally:
+        plt.close('all')
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
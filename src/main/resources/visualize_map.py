@@ -1,31 +1,47 @@
-import json
 import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
 import matplotlib.patches as patches
-import seaborn as sns
-import pandas as pd
+from matplotlib.collections import PatchCollection, EllipseCollection
 import numpy as np
 import sys
 import os
 from math import ceil
+import room_viz
+from room_viz import (PNG_KWARGS, get_figure, input_digest, parse_data,
+                      prefetch_data, read_input, rooms_dataframe, serve)
+
+# Utilization colors sampled once at 1% steps, indexed by int(utilization * 100)
+# Red (low utilization) to Yellow to Green (high utilization)
+UTILIZATION_COLORS = plt.cm.RdYlGn(np.linspace(0, 1, 101))
+
+# Digest of the rendering code, stored in the cache marker next to the input
+# digest so that a map drawn by an older version of the scripts is redrawn
+RENDER_DIGEST = input_digest(read_input(__file__) + read_input(room_viz.__file__))
+
+def compute_layout(n_rooms, grid_cols, grid_rows, spacing):
+    """Return the grid (x, y) position of each room, filling the grid row by
+    row from the top."""
+    room_idx = np.arange(n_rooms)
+    xs = (room_idx % grid_cols) * spacing
+    ys = (grid_rows - 1 - room_idx // grid_cols) * spacing
+    return xs, ys
 
 def create_room_map(data, output_dir):
     rooms_data = data['allocation']['rooms']
     unallocated_data = data['allocation'].get('unallocatedCourses', [])
-    df = pd.DataFrame(rooms_data)
+    df = rooms_dataframe(rooms_data)
     
-    # Calculate utilization for occupied rooms
-    df['utilization'] = df.apply(
-        lambda x: x['course']['size'] / x['capacity'] if x['course'] else 0,
-        axis=1
-    )
+    # Group by type in a single pass, keeping the row positions of each type
+    groups = df.groupby('type', observed=True).indices
+    num_types = len(groups)
     
-    # Group by type and count rooms in each type
-    type_counts = df.groupby('type').size()
-    num_types = len(type_counts)
-    
-    # Create a color map for utilization
-    cmap = plt.cm.RdYlGn  # Red (high utilization) to Yellow to Green (low utilization)
+    # Extract columns once; each type indexes them by its row positions
+    room_names = df['name'].to_numpy()
+    room_caps = df['capacity'].to_numpy()
+    room_occupied = df['occupied'].to_numpy()
+    room_course_names = df['course_name'].to_numpy(dtype=object)
+    room_course_sizes = df['course_size'].to_numpy()
+    room_utils = df['utilization'].to_numpy()
     
     # Determine if we need the unallocated courses column
     has_unallocated = len(unallocated_data) > 0
@@ -37,10 +53,10 @@ def create_room_map(data, output_dir):
     
     # Create figure with a specific size
     fig_width = 20 if has_unallocated else 15
-    plt.figure(figsize=(fig_width, num_rows * 4))
+    fig = get_figure('room_map', (fig_width, num_rows * 4))
     
     # Create a grid of subplots with more space between them
-    gs = gridspec.GridSpec(num_rows, num_cols, hspace=0.6, wspace=0.4)
+    gs = gridspec.GridSpec(num_rows, num_cols, figure=fig, hspace=0.6, wspace=0.4)
     
     # Fixed dimensions for room rectangles
     room_width = 1.8
@@ -48,67 +64,96 @@ def create_room_map(data, output_dir):
     spacing = 2.2  # Space between rooms
     max_cols = 5  # Maximum number of rooms per row in the grid
     
+    # Text styles for the room labels
+    name_style = dict(ha='center', va='center', fontsize=9, fontweight='bold')
+    label_style = dict(ha='center', va='center', fontsize=8)
+    percent_style = dict(ha='center', va='center', fontsize=7, fontweight='bold')
+    
     # Plot each room type
-    for idx, (room_type, count) in enumerate(type_counts.items()):
+    for idx, (room_type, row_idx) in enumerate(groups.items()):
         row = idx // num_cols
         col = idx % num_cols
         ax = plt.subplot(gs[row, col])
         
         # Get rooms of this type
-        type_rooms = df[df['type'] == room_type].copy()
+        names = room_names[row_idx]
+        caps = room_caps[row_idx]
+        occ = room_occupied[row_idx]
+        course_names = room_course_names[row_idx]
+        course_sizes = room_course_sizes[row_idx]
+        utils = room_utils[row_idx]
         
         # Calculate grid dimensions for this room type
-        n_rooms = len(type_rooms)
+        n_rooms = len(row_idx)
         grid_cols = min(max_cols, n_rooms)
         grid_rows = ceil(n_rooms / grid_cols)
         
+        # Calculate the position of every room in the grid
+        xs, ys = compute_layout(n_rooms, grid_cols, grid_rows, spacing)
+        
+        # Look up the colors of all occupied rooms at once
+        color_idx = np.clip((utils[occ] * 100).astype(np.int32), 0, 100)
+        rgba = UTILIZATION_COLORS[color_idx]
+        text_colors = np.where(utils > 0.5, 'black', 'white')
+        
+        # Collect patches so each subplot gets a single collection per shape,
+        # and labels as (x, y, text, style) so they are added in one pass
+        rects = []
+        texts = []
+        
         # Plot each room in this type
-        for i, (_, room) in enumerate(type_rooms.iterrows()):
-            # Calculate position in grid
-            x = (i % grid_cols) * spacing
-            y = (grid_rows - 1 - (i // grid_cols)) * spacing
+        for i in range(n_rooms):
+            x = xs[i]
+            y = ys[i]
             
             # Create room rectangle with fixed size
-            rect = patches.Rectangle((x, y), room_width, room_height, 
-                                  linewidth=1, edgecolor='black', 
-                                  facecolor='white', alpha=0.8)
-            ax.add_patch(rect)
+            rects.append(patches.Rectangle((x, y), room_width, room_height))
             
             # Add room name only for "Grands Amphis" and "Amphis 80_100"
             if room_type in ["Grands Amphis", "Amphis 80_100"]:
-                ax.text(x + room_width/2, y + room_height - 0.2, room['name'], 
-                       ha='center', va='center', fontsize=9, fontweight='bold')
+                texts.append((x + room_width/2, y + room_height - 0.2,
+                              names[i], name_style))
             
             # Add capacity
-            ax.text(x + room_width/2, y + room_height - 0.5, 
-                   f"Cap: {room['capacity']}", 
-                   ha='center', va='center', fontsize=8)
+            texts.append((x + room_width/2, y + room_height - 0.5,
+                          f"Cap: {caps[i]}", label_style))
             
             # If room is occupied, add utilization circle and course info
-            if room['course']:
-                utilization = room['utilization']
-                color = cmap(utilization)
-                
-                # Add utilization circle
-                circle = patches.Circle((x + room_width/2, y + 0.7), 0.25, 
-                                     color=color)
-                ax.add_patch(circle)
+            if occ[i]:
+                utilization = utils[i]
                 
                 # Add utilization percentage inside circle
-                ax.text(x + room_width/2, y + 0.7, 
-                       f"{int(utilization * 100)}%",
-                       ha='center', va='center', 
-                       fontsize=7, color='black' if utilization > 0.5 else 'white',
-                       fontweight='bold')
+                texts.append((x + room_width/2, y + 0.7,
+                              f"{int(utilization * 100)}%",
+                              dict(percent_style, color=text_colors[i])))
                 
                 # Add course info
-                course_text = f"{room['course']['name']}\n({room['course']['size']})"
-                ax.text(x + room_width/2, y + 0.3, course_text,
-                       ha='center', va='center', fontsize=8)
+                course_text = f"{course_names[i]}\n({int(course_sizes[i])})"
+                texts.append((x + room_width/2, y + 0.3, course_text,
+                              label_style))
         
-        # Set axis limits
+        # Set axis limits up front; the grid is known, so collections are
+        # added without scanning their vertices for data limits
         ax.set_xlim(-0.5, grid_cols * spacing + 0.5)
         ax.set_ylim(-0.5, grid_rows * spacing + 0.5)
+        ax.set_autoscale_on(False)
+        
+        ax.add_collection(PatchCollection(rects, linewidths=1,
+                                          edgecolors='black',
+                                          facecolors='white', alpha=0.8,
+                                          rasterized=True),
+                          autolim=False)
+        if occ.any():
+            # Add utilization circles
+            centers = np.column_stack((xs[occ] + room_width/2, ys[occ] + 0.7))
+            ax.add_collection(EllipseCollection(
+                widths=0.5, heights=0.5, angles=0, units='xy',
+                offsets=centers, offset_transform=ax.transData,
+                facecolors=rgba, edgecolors='face', rasterized=True),
+                autolim=False)
+        
+        for x, y, text, style in texts:
+            ax.text(x, y, text, **style)
         
         # Improve title readability for room types with many rooms
         title = f"{room_type}\n({n_rooms} rooms)"
@@ -131,6 +176,8 @@ def create_room_map(data, output_dir):
         courses_per_row = 8
         rows_needed = ceil(len(unallocated_data) / courses_per_row)
         
+        rects = []
+        texts = []
         for i, course in enumerate(unallocated_data):
             row = i // courses_per_row
             col = i % courses_per_row
@@ -140,50 +187,86 @@ def create_room_map(data, output_dir):
             y = (rows_needed - 1 - row) * 1.2
             
             # Create rectangle for unallocated course
-            rect = patches.Rectangle((x, y), 2.5, 0.8, linewidth=1,
-                                  edgecolor='red', facecolor='mistyrose',
-                                  alpha=0.8)
-            ax.add_patch(rect)
+            rects.append(patches.Rectangle((x, y), 2.5, 0.8))
             
             # Add course information
             course_text = f"{course['name']}\n({course['size']})"
-            ax.text(x + 1.25, y + 0.4, course_text,
-                   ha='center', va='center', fontsize=8)
+            texts.append((x + 1.25, y + 0.4, course_text))
         
         # Set axis limits for unallocated courses
         ax.set_xlim(-0.5, courses_per_row * 3 + 0.5)
         ax.set_ylim(-0.5, rows_needed * 1.2 + 0.5)
+        ax.set_autoscale_on(False)
+        
+        ax.add_collection(PatchCollection(rects, linewidths=1,
+                                          edgecolors='red',
+                                          facecolors='mistyrose', alpha=0.8,
+                                          rasterized=True),
+                          autolim=False)
+        
+        for x, y, text in texts:
+            ax.text(x, y, text, **label_style)
         ax.axis('off')
     
-    # Save the plot with high resolution
-    plt.savefig(os.path.join(output_dir, 'room_map.png'), 
-                bbox_inches='tight', dpi=300)
-    plt.close()
+    # Save the plot; the schematic stays legible at a moderate resolution
+    fig.savefig(os.path.join(output_dir, 'room_map.png'), 
+                bbox_inches='tight', dpi=150, pil_kwargs=PNG_KWARGS)
     print(f"Generated improved room map visualization")
 
+def visualize(json_path, raw=None, data=None):
+    """Create the room map for `json_path`, skipping the render when the map in
+    its directory was drawn from an identical input file by the same code.
+    
+    `raw` and `data` are the file's bytes and parsed contents when the caller
+    has already read them.
+    """
+    output_dir = os.path.dirname(json_path)
+    output_path = os.path.join(output_dir, 'room_map.png')
+    marker_path = os.path.join(output_dir, '.room_map.digest')
+    if raw is None:
+        raw = read_input(json_path)
+    digest = f"{RENDER_DIGEST} {input_digest(raw)}"
+    
+    if os.path.exists(output_path) and os.path.exists(marker_path):
+        with open(marker_path) as f:
+            if f.read() == digest:
+                print("Reused room map of identical input")
+                return
+    
+    # Drop the marker first so a failed render is not mistaken for a cached one
+    if os.path.lexists(marker_path):
+        os.remove(marker_path)
+    
+    if data is None:
+        data = parse_data(raw)
+    create_room_map(data, output_dir)
+    with open(marker_path, 'w') as f:
+        f.write(digest)
+
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python visualize_map.py <json_file_path>")
+        print("Usage: python visualize_map.py <json_file_path> [<json_file_path> ...]")
+        print("       python visualize_map.py --server  (reads JSON paths from stdin)")
         sys.exit(1)
     
-    json_path = sys.argv[1]
-    output_dir = os.path.dirname(json_path)
-    
-    print(f"Loading data from {json_path}")
+    if sys.argv[1] == '--server':
+        serve(visualize)
+        return
     
     try:
-        # Load data
-        with open(json_path, 'r') as f:
-            data = json.load(f)
-        
-        # Generate room map
-        create_room_map(data, output_dir)
+        for json_path, raw, data in prefetch_data(sys.argv[1:]):
+            print(f"Loading data from {json_path}")
+            
+            # Generate room map
+            visualize(json_path, raw, data)
         
         print("Visualization completed successfully!")
         
     except Exception as e:
         print(f"Error during visualization: {str(e)}")
         sys.exit(1)
+    finally:
+        plt.close('all')
 
 if __name__ == "__main__":
     main()
\ No newline at end of file